@@ -8,7 +8,6 @@ from rich.table import Table
 from rich.logging import RichHandler
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
-from .processor import DataProcessor
 from .config import settings
 
 # Setup rich console and logging
@@ -30,6 +29,8 @@ logger = logging.getLogger(__name__)
 def init():
     """Initialize the database schema for processed data"""
     async def _init():
+        from .processor import DataProcessor
+        
         async with DataProcessor() as processor:
             await processor.init_database()
             console.print("✅ Database schema initialized", style="green")
@@ -58,6 +59,8 @@ def process(
     """Process FDA documents to extract structured features"""
     
     async def _process():
+        from .processor import DataProcessor
+        
         console.print(f"🚀 Starting data processing pipeline", style="bold blue")
         console.print(f"Product type: {product_type}")
         if limit:
@@ -94,6 +97,8 @@ def status(session_id: str):
     """Check the status of a processing session"""
     
     async def _status():
+        from .processor import DataProcessor
+        
         try:
             async with DataProcessor() as processor:
                 status = await processor.get_session_status(session_id)
@@ -127,6 +132,8 @@ def test(
     """Test the processing pipeline components"""
     
     async def _test():
+        from .processor import DataProcessor
+        
         console.print("🔧 Testing pipeline components...", style="bold yellow")
         
         try:
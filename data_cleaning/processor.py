@@ -2,12 +2,15 @@
 import asyncio
 import logging
 from datetime import datetime
+from pathlib import Path
 from typing import List, Optional, Dict, Any
 import uuid
 
+import zstandard
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy import select, text, and_
+from sqlalchemy import select, text, and_, update
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateSchema
 
 from .config import settings
 from .models import Base, ProcessingSession, DocumentFeatures, ProcessingLog, ExtractionRequest
@@ -22,7 +25,9 @@ class DataProcessor:
     
     def __init__(self):
         # Database setup
-        self.engine = create_async_engine(settings.database_url)
+        # Every concurrent document holds a connection while it logs and saves;
+        # size the pool so those stay pooled instead of churning as overflow
+        self.engine = create_async_engine(settings.database_url, pool_size=settings.max_concurrency)
         self.async_session = async_sessionmaker(
             self.engine, expire_on_commit=False
         )
@@ -30,9 +35,15 @@ class DataProcessor:
         # Processing components
         self.pdf_extractor = PDFExtractor()
         self.llm_processor = LLMProcessor()
+        # Loop time at which the next LLM call may start
+        self._next_llm_call = 0.0
         
         # Current session
         self.session_id: Optional[str] = None
+        
+        # Session counter increments not yet written, flushed once per batch
+        self._pending_processed = 0
+        self._pending_failed = 0
     
     async def __aenter__(self):
         """Async context manager entry"""
@@ -47,7 +58,7 @@ class DataProcessor:
         """Initialize database schema for processed data"""
         async with self.engine.begin() as conn:
             # Create source schema if not exists (should already exist from crawler)
-            await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {settings.source_schema}"))
+            await conn.execute(CreateSchema(settings.source_schema, if_not_exists=True))
             # Create tables
             await conn.run_sync(Base.metadata.create_all)
         logger.info("Source data schema initialized with processing tables")
@@ -126,18 +137,22 @@ class DataProcessor:
                     d.guidance_status,
                     d.regulated_products,
                     d.topics,
-                    da.pdf_content,
+                    COALESCE(da.pdf_content, ref.pdf_content) AS pdf_content,
+                    da.local_path,
+                    COALESCE(da.content_encoding, ref.content_encoding) AS content_encoding,
                     da.filename,
                     da.size_bytes
                 FROM source.documents d
                 JOIN source.document_attachments da ON d.id = da.document_id
-                WHERE da.pdf_content IS NOT NULL 
+                -- Duplicate PDFs point at the attachment that stores the bytes
+                LEFT JOIN source.document_attachments ref ON ref.id = da.content_ref_id
+                WHERE (da.pdf_content IS NOT NULL OR da.local_path IS NOT NULL OR da.content_ref_id IS NOT NULL)
                   AND da.download_status = 'completed'
                   AND d.processing_status = 'completed'
                   AND (
                     LOWER(d.title) LIKE '%medical device%' OR
                     LOWER(d.topic) LIKE '%medical device%' OR
-                    LOWER(d.regulated_products) LIKE '%medical device%' OR
+                    LOWER(d.regulated_products::text) LIKE '%medical device%' OR
                     LOWER(d.fda_organization) LIKE '%device%' OR
                     LOWER(d.fda_organization) LIKE '%cdrh%'
                   )
@@ -169,6 +184,8 @@ class DataProcessor:
                     'regulated_products': row.regulated_products,
                     'topics': row.topics,
                     'pdf_content': row.pdf_content,
+                    'local_path': row.local_path,
+                    'content_encoding': row.content_encoding,
                     'filename': row.filename,
                     'size_bytes': row.size_bytes
                 })
@@ -182,8 +199,6 @@ class DataProcessor:
         async def process_single(doc: Dict[str, Any]):
             async with semaphore:
                 await self._process_single_document(doc, session_id)
-                # Rate limiting for LLM API
-                await asyncio.sleep(60.0 / settings.rate_limit_requests_per_minute)
         
         # Process in batches
         for i in range(0, len(documents), settings.batch_size):
@@ -193,6 +208,7 @@ class DataProcessor:
             
             tasks = [process_single(doc) for doc in batch]
             await asyncio.gather(*tasks, return_exceptions=True)
+            await self._flush_session_counters(session_id)
             
             logger.info(f"Completed batch {i//settings.batch_size + 1}")
     
@@ -206,6 +222,13 @@ class DataProcessor:
             
             # Step 1: Extract text from PDF
             pdf_content = document['pdf_content']
+            if pdf_content is None:
+                # Crawler stored the PDF on disk (PDF_STORAGE=filesystem)
+                pdf_content = await asyncio.get_running_loop().run_in_executor(
+                    None, Path(document['local_path']).read_bytes
+                )
+            elif document['content_encoding'] == 'zstd':
+                pdf_content = zstandard.decompress(pdf_content)
             filename = document.get('filename', f"{doc_id}.pdf")
             
             extraction_result = self.pdf_extractor.extract_text(pdf_content, filename)
@@ -241,6 +264,7 @@ class DataProcessor:
             )
             
             # Step 3: Extract features using LLM
+            await self._wait_for_llm_slot()
             extraction_response = await self.llm_processor.extract_features(extraction_request)
             
             if not extraction_response.success:
@@ -275,6 +299,15 @@ class DataProcessor:
             await self._log_message("ERROR", error_msg, doc_id)
             await self._increment_failed_count(session_id)
     
+    async def _wait_for_llm_slot(self):
+        """Hold this document until RATE_LIMIT_REQUESTS_PER_MINUTE allows another LLM call"""
+        # Reserve the next start time before sleeping so concurrent documents queue up behind it
+        now = asyncio.get_running_loop().time()
+        start = max(self._next_llm_call, now)
+        self._next_llm_call = start + 60.0 / settings.rate_limit_requests_per_minute
+        if start > now:
+            await asyncio.sleep(start - now)
+    
     async def _save_processed_document(
         self,
         document_id: str,
@@ -344,43 +377,55 @@ class DataProcessor:
                 logger.info(f"Created new processing session {new_session.id}")
                 return str(new_session.id)
     
-    async def _update_session_total(self, session_id: str, total: int):
-        """Update session with total document count"""
+    async def _update_session(self, session_id: str, **values):
+        """Set columns on the session row with one UPDATE, without loading it first"""
         async with self.async_session() as session:
-            proc_session = await session.get(ProcessingSession, session_id)
-            proc_session.total_documents = total
+            await session.execute(
+                update(ProcessingSession)
+                .where(ProcessingSession.id == session_id)
+                .values(**values)
+            )
             await session.commit()
     
+    async def _update_session_total(self, session_id: str, total: int):
+        """Update session with total document count"""
+        await self._update_session(session_id, total_documents=total)
+    
     async def _increment_processed_count(self, session_id: str):
-        """Increment processed document count"""
-        async with self.async_session() as session:
-            proc_session = await session.get(ProcessingSession, session_id)
-            proc_session.processed_documents += 1
-            await session.commit()
+        """Increment processed document count (written by the next counter flush)"""
+        self._pending_processed += 1
     
     async def _increment_failed_count(self, session_id: str):
-        """Increment failed document count"""
+        """Increment failed document count (written by the next counter flush)"""
+        self._pending_failed += 1
+    
+    async def _flush_session_counters(self, session_id: str):
+        """Add the pending counts to the session row in a single in-place UPDATE"""
+        processed, self._pending_processed = self._pending_processed, 0
+        failed, self._pending_failed = self._pending_failed, 0
+        if not processed and not failed:
+            return
+        
         async with self.async_session() as session:
-            proc_session = await session.get(ProcessingSession, session_id)
-            proc_session.failed_documents += 1
+            await session.execute(
+                update(ProcessingSession)
+                .where(ProcessingSession.id == session_id)
+                .values(
+                    processed_documents=ProcessingSession.processed_documents + processed,
+                    failed_documents=ProcessingSession.failed_documents + failed,
+                )
+            )
             await session.commit()
     
     async def _complete_session(self, session_id: str):
         """Mark session as completed"""
-        async with self.async_session() as session:
-            proc_session = await session.get(ProcessingSession, session_id)
-            proc_session.status = "completed"
-            proc_session.completed_at = datetime.utcnow()
-            await session.commit()
+        await self._update_session(session_id, status="completed", completed_at=datetime.utcnow())
     
     async def _fail_session(self, session_id: str, error_message: str):
         """Mark session as failed"""
-        async with self.async_session() as session:
-            proc_session = await session.get(ProcessingSession, session_id)
-            proc_session.status = "failed"
-            proc_session.last_error = error_message
-            proc_session.completed_at = datetime.utcnow()
-            await session.commit()
+        await self._update_session(
+            session_id, status="failed", last_error=error_message, completed_at=datetime.utcnow()
+        )
     
     async def _log_message(
         self, 
@@ -1,7 +1,15 @@
 """FDA Guidance Documents Harvester - Lean Implementation"""
 
-from .crawler import FDACrawler
 from .config import settings
 
 __version__ = "1.0.0"
 __all__ = ['FDACrawler', 'settings']
+
+
+def __getattr__(name):
+    # Import the crawler lazily so the CLI can print --help without
+    # pulling in httpx, SQLAlchemy and asyncpg
+    if name == 'FDACrawler':
+        from .crawler import FDACrawler
+        return FDACrawler
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,7 +5,6 @@ import typer
 from rich.console import Console
 from rich.table import Table
 
-from .crawler import FDACrawler
 from .config import settings
 
 app = typer.Typer(help="FDA Guidance Documents Harvester - Simple Implementation")
@@ -16,6 +15,8 @@ console = Console()
 def init():
     """Initialize database schema"""
     async def _init():
+        from .crawler import FDACrawler
+        
         async with FDACrawler() as crawler:
             await crawler.init_database()
             console.print("✅ Database initialized successfully")
@@ -31,6 +32,8 @@ def crawl(
 ):
     """Run the full crawl process"""
     async def _crawl():
+        from .crawler import FDACrawler
+        
         # Override settings if provided
         if concurrency != 4:
             settings.max_concurrency = concurrency
@@ -48,6 +51,8 @@ def crawl(
 def resume(session_id: str):
     """Resume an interrupted crawl session"""
     async def _resume():
+        from .crawler import FDACrawler
+        
         async with FDACrawler() as crawler:
             resumed_session_id = await crawler.crawl(resume_session_id=session_id)
             console.print(f"✅ Session resumed. Session ID: {resumed_session_id}")
@@ -59,6 +64,8 @@ def resume(session_id: str):
 def status(session_id: str):
     """Check the status of a crawl session"""
     async def _status():
+        from .crawler import FDACrawler
+        
         async with FDACrawler() as crawler:
             status_data = await crawler.get_session_status(session_id)
             if not status_data:
@@ -88,6 +95,8 @@ def test(limit: int = 5):
     console.print(f"🧪 Running test crawl with {limit} documents...")
     
     async def _test():
+        from .crawler import FDACrawler
+        
         async with FDACrawler() as crawler:
             session_id = await crawler.crawl(test_limit=limit)
             console.print(f"✅ Test completed. Session ID: {session_id}")
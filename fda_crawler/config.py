@@ -18,12 +18,14 @@ class Settings(BaseSettings):
     schema_name: str = Field(default="source", env="SCHEMA_NAME")
     
     # File storage (optional - PDFs stored in database by default)
+    pdf_storage: str = Field(default="database", env="PDF_STORAGE")  # database, filesystem
     pdf_root: Path = Field(default=Path("./exported_pdfs"), env="PDF_ROOT")
     
     # Crawling behavior
     max_concurrency: int = Field(default=4, env="MAX_CONCURRENCY")
     rate_limit: float = Field(default=1.0, env="RATE_LIMIT")  # requests per second
     user_agent: str = Field(default="FDA-Crawler/1.0", env="USER_AGENT")
+    write_batch_size: int = Field(default=50, env="WRITE_BATCH_SIZE")  # documents per write batch (full batches use COPY)
     
     # HTTP timeouts
     connect_timeout: int = Field(default=30, env="CONNECT_TIMEOUT")
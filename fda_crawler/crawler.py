@@ -1,72 +1,348 @@
 """FDA Guidance Documents Crawler - All-in-one implementation"""
 import asyncio
 import hashlib
-import json
 import logging
+import multiprocessing
+import os
+import pickle
 import re
+import uuid
+from collections import OrderedDict
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, replace
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from html import unescape
+from pathlib import Path
+from types import MappingProxyType
+from typing import BinaryIO, Dict, Any, Optional, List, Set, Tuple
 from urllib.parse import urljoin
 
 import httpx
-from bs4 import BeautifulSoup
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy import select, text
-from sqlalchemy.exc import IntegrityError
+import lxml.html
+import orjson
+import zstandard
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncConnection, AsyncSession, async_sessionmaker
+from sqlalchemy import Table, insert, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.schema import CreateSchema
 
 from .config import settings
 from .models import Base, CrawlSession, Document, DocumentAttachment
 
 logger = logging.getLogger(__name__)
 
+# Number of recent PDF downloads kept for documents sharing a /media/<id>/download URL
+_PDF_CACHE_SIZE = 32
+
+# Bytes read per chunk when streaming PDF downloads
+_DOWNLOAD_CHUNK_SIZE = 65536
+
+# zstd level for PDFs stored in the database; cheap to compress, fast to decompress
+_PDF_ZSTD_LEVEL = 3
+
+# Responses that mean the server wants us to slow down
+_THROTTLE_STATUSES = frozenset({429, 503})
+
+# Longest spacing back-off may stretch the rate limiter to, and longest Retry-After honoured, in seconds
+_MAX_BACKOFF_INTERVAL = 60.0
+
+# Factor applied to a backed-off interval on each request until it is back to RATE_LIMIT
+_BACKOFF_RECOVERY = 0.95
+
+# Trigger function handing shared PDF bytes over on delete; migrate.sql includes the same file
+_HAND_OVER_SHARED_PDF_SQL = Path(__file__).with_name("hand_over_shared_pdf.sql")
+
+_FDA_BASE = "https://www.fda.gov"
+
+# Static JSON behind the DataTable on FDA's guidance search page; the whole listing in one response
+_LISTING_URL = f"{_FDA_BASE}/files/api/datatables/static/search-for-guidance.json"
+_LISTING_HEADERS = {
+    "Accept": "application/json, text/javascript, */*; q=0.01",
+    "Referer": "https://www.fda.gov/regulatory-information/search-fda-guidance-documents",
+    "X-Requested-With": "XMLHttpRequest",
+}
+
+_PDF_HREF_RE = re.compile(r'/media/\d+/download')
+
+# Sidebar <dt> keyword -> document field
+_SIDEBAR_FIELDS = (
+    ('issue date', 'issue_date'),
+    ('issued', 'issue_date'),
+    ('organization', 'fda_organization'),
+    ('center', 'fda_organization'),
+    ('topic', 'topic'),
+    ('status', 'guidance_status'),
+    ('docket', 'docket_number'),
+    ('type', 'guidance_type'),
+    ('regulated product', 'regulated_products'),
+    ('current as of', 'content_current_date'),
+)
+
+# All sidebar keywords in one pass; group N matches _SIDEBAR_FIELDS[N - 1]
+_SIDEBAR_LABEL_RE = re.compile('|'.join(f'({re.escape(keyword)})' for keyword, _ in _SIDEBAR_FIELDS))
+
+
+def _div_with_class(name: str) -> lxml.etree.XPath:
+    """XPath for <div>s carrying `name` as one of their classes"""
+    return lxml.etree.XPath(f"//div[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]")
+
+
+_SIDEBAR_XPATH = _div_with_class('region-sidebar-second')
+_ASIDE_XPATH = lxml.etree.XPath('//aside')
+_SUMMARY_XPATH = _div_with_class('field-type-text-with-summary')
+_FIELD_ITEM_XPATH = _div_with_class('field-item')
+_NEXT_DD_XPATH = lxml.etree.XPath('following-sibling::dd[1]')
+
+
+def _first_match(node: lxml.html.HtmlElement, *xpaths: lxml.etree.XPath) -> Optional[lxml.html.HtmlElement]:
+    """First element matched by the first of `xpaths` that matches anything"""
+    for xpath in xpaths:
+        found = xpath(node)
+        if found:
+            return found[0]
+    return None
+
+
+def _text(element: lxml.html.HtmlElement) -> str:
+    """Stripped text pieces of an element joined together, like get_text(strip=True)"""
+    return ''.join(piece.strip() for piece in element.itertext())
+
+
+# The API embeds each link as a small <a href="...">text</a> fragment;
+# a regex is enough for that and avoids an HTML parse per row
+_ANCHOR_RE = re.compile(
+    r'<a\b[^>]*?\shref\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))[^>]*>(.*?)</a>',
+    re.IGNORECASE | re.DOTALL
+)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def _absolute_url(href: str, base: str = _FDA_BASE) -> str:
+    """Resolve an href from an FDA page, skipping urljoin for the usual absolute and root-relative forms"""
+    if href.startswith(('https://', 'http://')):
+        return href
+    if href.startswith('/') and not href.startswith('//'):
+        return _FDA_BASE + href
+    return urljoin(base, href)
+
+
+def _first_link(fragment: str) -> Optional[Tuple[str, str]]:
+    """Return (href, text) of the first <a> in a small HTML fragment, if any"""
+    match = _ANCHOR_RE.search(fragment) if fragment else None
+    if match is None:
+        return None
+    double_quoted, single_quoted, unquoted, inner = match.groups()
+    href = next(value for value in (double_quoted, single_quoted, unquoted) if value is not None)
+    return unescape(href), unescape(_TAG_RE.sub('', inner)).strip()
+
+
+@dataclass
+class DocData:
+    """Metadata for one guidance document, from the API listing and its page"""
+    document_url: str
+    title: str = ''
+    summary: str = ''
+    issue_date: str = ''
+    fda_organization: str = ''
+    topic: str = ''
+    guidance_status: str = ''
+    open_for_comment: bool = False
+    comment_closing_date: str = ''
+    docket_number: str = ''
+    guidance_type: str = ''
+    regulated_products: Optional[List[str]] = None
+    topics: Optional[List[str]] = None
+    content_current_date: str = ''
+    pdf_url: str = ''
+
+
+def _parse_document_page(html: str, document_url: str) -> DocData:
+    """Parse FDA document page to extract metadata (module-level so worker processes can run it)"""
+    doc_data = DocData(document_url=document_url)
+    
+    try:
+        tree = lxml.html.fromstring(html)
+    except lxml.etree.ParserError:
+        return doc_data
+    
+    # Extract title
+    title_elem = next(tree.iter('h1'), None)
+    if title_elem is not None:
+        doc_data.title = _text(title_elem)
+    
+    # Extract PDF link
+    pdf_link = next((a for a in tree.iter('a') if _PDF_HREF_RE.search(a.get('href', ''))), None)
+    if pdf_link is not None:
+        doc_data.pdf_url = _absolute_url(pdf_link.get('href'), document_url)
+    
+    # Extract sidebar metadata
+    sidebar = _first_match(tree, _SIDEBAR_XPATH, _ASIDE_XPATH)
+    if sidebar is not None:
+        # Look for structured data in sidebar
+        for dt in sidebar.iter('dt'):
+            match = _SIDEBAR_LABEL_RE.search(_text(dt).lower())
+            if match is None:
+                continue
+            field = _SIDEBAR_FIELDS[match.lastindex - 1][1]
+            dd = _first_match(dt, _NEXT_DD_XPATH)
+            if dd is not None:
+                value = _text(dd)
+                if field == 'regulated_products':
+                    # Stored as a JSONB array
+                    value = [p.strip() for p in value.split(',') if p.strip()]
+                setattr(doc_data, field, value)
+    
+    # Extract summary from main content
+    main_content = _first_match(tree, _SUMMARY_XPATH, _FIELD_ITEM_XPATH)
+    if main_content is not None:
+        paragraph = next(main_content.iter('p'), None)
+        if paragraph is not None:
+            doc_data.summary = _text(paragraph)[:1000]  # Limit length
+    
+    return doc_data
+
+
+class _RateLimiter:
+    """Spaces out entries evenly so all workers together stay under `rate` per second"""
+    
+    def __init__(self, rate: float):
+        self._base_interval = 1.0 / rate
+        self._interval = self._base_interval
+        self._next_slot = 0.0
+    
+    def back_off(self, delay: Optional[float] = None):
+        """Halve the rate and push the next free slot `delay` seconds out (workers already sleeping keep theirs)"""
+        self._interval = min(self._interval * 2, _MAX_BACKOFF_INTERVAL)
+        now = asyncio.get_running_loop().time()
+        self._next_slot = max(self._next_slot, now + (delay if delay is not None else self._interval))
+    
+    async def __aenter__(self):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(self._next_slot, now)
+        self._next_slot = slot + self._interval
+        # Creep back toward the configured rate once the server stops pushing back
+        self._interval = max(self._base_interval, self._interval * _BACKOFF_RECOVERY)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class _ThrottleRetryTransport(httpx.AsyncHTTPTransport):
+    """Retries requests FDA throttled, after backing the shared rate limiter off"""
+    
+    def __init__(self, rate_limiter: _RateLimiter, **kwargs):
+        super().__init__(**kwargs)
+        self._rate_limiter = rate_limiter
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(settings.max_retries + 1):
+            response = await super().handle_async_request(request)
+            if response.status_code not in _THROTTLE_STATUSES:
+                return response
+            
+            retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else settings.retry_delay * 2 ** attempt
+            delay = min(delay, _MAX_BACKOFF_INTERVAL)
+            self._rate_limiter.back_off(delay)
+            if attempt == settings.max_retries:
+                return response
+            
+            logger.warning("Got %s from %s, retrying in %.1fs", response.status_code, request.url, delay)
+            await response.aclose()
+            await asyncio.sleep(delay)
+
+
+def _is_throttled(error: Exception) -> bool:
+    """True if a request still failed with a throttling status after its retries"""
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code in _THROTTLE_STATUSES
+
+
+def _is_pool_failure(error: Exception) -> bool:
+    """True if the parse pool itself failed, as opposed to the page being unparseable"""
+    return isinstance(error, (BrokenExecutor, pickle.PickleError))
+
+
+def _open_for_write(path: Path) -> BinaryIO:
+    """Open a new file for writing, creating parent directories"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return open(path, 'wb')
+
+
+def _move_into_place(tmp_path: Path, checksum: str) -> Path:
+    """Move a finished download to its checksum-keyed path under PDF_ROOT"""
+    path = (settings.pdf_root / checksum[:2] / f"{checksum}.pdf").resolve()
+    path.parent.mkdir(exist_ok=True)
+    tmp_path.replace(path)
+    return path
+
+
+# Known FDA documents for fallback, read-only and shared by every crawler
+_FALLBACK_DOCUMENTS = tuple(MappingProxyType(doc) for doc in (
+    {
+        'title': 'Medical Device User Fee Small Business Qualification and Determination: Guidance for Industry, Food and Drug Administration Staff and Foreign Governments',
+        'document_url': 'https://www.fda.gov/regulatory-information/search-fda-guidance-documents/medical-device-user-fee-small-business-qualification-and-determination',
+        'pdf_url': 'https://www.fda.gov/media/176439/download',
+        'pdf_size': '418.69 KB',
+        'issue_date': '07/31/2025',
+        'fda_organization': 'Center for Devices and Radiological Health Center for Biologics Evaluation and Research',
+        'topic': 'User Fees, Administrative / Procedural',
+        'guidance_status': 'Final',
+        'open_for_comment': False,
+    },
+    {
+        'title': 'CVM GFI #294 - Animal Food Ingredient Consultation (AFIC)',
+        'document_url': 'https://www.fda.gov/regulatory-information/search-fda-guidance-documents/cvm-gfi-294-animal-food-ingredient-consultation-afic',
+        'pdf_url': 'https://www.fda.gov/media/180442/download',
+        'pdf_size': '397.81 KB',
+        'issue_date': '07/31/2025',
+        'fda_organization': 'Center for Veterinary Medicine',
+        'topic': 'Premarket, Animal Food Additives, Labeling, Safety - Issues, Errors, and Problems',
+        'guidance_status': 'Final',
+        'open_for_comment': False,
+    },
+    {
+        'title': 'E21 Inclusion of Pregnant and Breastfeeding Women in Clinical Trials: Draft Guidance for Industry',
+        'document_url': 'https://www.fda.gov/regulatory-information/search-fda-guidance-documents/e21-inclusion-pregnant-and-breastfeeding-women-clinical-trials',
+        'pdf_url': 'https://www.fda.gov/media/187755/download',
+        'pdf_size': '429.62 KB',
+        'issue_date': '07/21/2025',
+        'fda_organization': 'Center for Biologics Evaluation and Research Center for Drug Evaluation and Research Office of the Commissioner,Office of Women\'s Health',
+        'topic': 'ICH-Efficacy',
+        'guidance_status': 'Draft',
+        'open_for_comment': True,
+    },
+))
+
 
 class FDACrawler:
     """Simple, consolidated FDA crawler implementation"""
     
     # Known FDA documents for fallback
-    FALLBACK_DOCUMENTS = [
-        {
-            'title': 'Medical Device User Fee Small Business Qualification and Determination: Guidance for Industry, Food and Drug Administration Staff and Foreign Governments',
-            'document_url': 'https://www.fda.gov/regulatory-information/search-fda-guidance-documents/medical-device-user-fee-small-business-qualification-and-determination',
-            'pdf_url': 'https://www.fda.gov/media/176439/download',
-            'pdf_size': '418.69 KB',
-            'issue_date': '07/31/2025',
-            'fda_organization': 'Center for Devices and Radiological Health Center for Biologics Evaluation and Research',
-            'topic': 'User Fees, Administrative / Procedural',
-            'guidance_status': 'Final',
-            'open_for_comment': False,
-        },
-        {
-            'title': 'CVM GFI #294 - Animal Food Ingredient Consultation (AFIC)',
-            'document_url': 'https://www.fda.gov/regulatory-information/search-fda-guidance-documents/cvm-gfi-294-animal-food-ingredient-consultation-afic',
-            'pdf_url': 'https://www.fda.gov/media/180442/download',
-            'pdf_size': '397.81 KB',
-            'issue_date': '07/31/2025',
-            'fda_organization': 'Center for Veterinary Medicine',
-            'topic': 'Premarket, Animal Food Additives, Labeling, Safety - Issues, Errors, and Problems',
-            'guidance_status': 'Final',
-            'open_for_comment': False,
-        },
-        {
-            'title': 'E21 Inclusion of Pregnant and Breastfeeding Women in Clinical Trials: Draft Guidance for Industry',
-            'document_url': 'https://www.fda.gov/regulatory-information/search-fda-guidance-documents/e21-inclusion-pregnant-and-breastfeeding-women-clinical-trials',
-            'pdf_url': 'https://www.fda.gov/media/187755/download',
-            'pdf_size': '429.62 KB',
-            'issue_date': '07/21/2025',
-            'fda_organization': 'Center for Biologics Evaluation and Research Center for Drug Evaluation and Research Office of the Commissioner,Office of Women\'s Health',
-            'topic': 'ICH-Efficacy',
-            'guidance_status': 'Draft',
-            'open_for_comment': True,
-        },
-    ]
+    FALLBACK_DOCUMENTS = _FALLBACK_DOCUMENTS
     
     def __init__(self):
-        self.engine = create_async_engine(settings.database_url)
+        self.engine = create_async_engine(
+            settings.database_url,
+            json_serializer=lambda value: orjson.dumps(value).decode()
+        )
         self.async_session = async_sessionmaker(
             self.engine, expire_on_commit=False
         )
         self.client: Optional[httpx.AsyncClient] = None
         self.session_id: Optional[str] = None
+        self._rate_limiter = _RateLimiter(settings.rate_limit)
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        
+        # Recent PDF downloads by URL (in flight or finished), oldest first
+        self._pdf_cache: "OrderedDict[str, asyncio.Future]" = OrderedDict()
+        
+        # Documents waiting for the next batched insert
+        self._pending_writes: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]] = []
+        self._pending_failures = 0
+        self._flush_lock = asyncio.Lock()
     
     async def __aenter__(self):
         """Async context manager entry"""
@@ -77,25 +353,120 @@ class FDACrawler:
                 write=settings.connect_timeout,
                 pool=settings.read_timeout
             ),
+            transport=_ThrottleRetryTransport(
+                self._rate_limiter,
+                limits=httpx.Limits(
+                    max_connections=settings.max_concurrency,
+                    max_keepalive_connections=settings.max_concurrency,
+                    # RATE_LIMIT can space requests further apart than httpx's 5s default
+                    keepalive_expiry=60
+                ),
+                http2=True
+            ),
             headers={"User-Agent": settings.user_agent},
             follow_redirects=True
         )
+        # Page parsing is CPU-bound; keep it from stalling in-flight requests.
+        # No more than max_concurrency parses are ever in flight, and workers
+        # come from a forkserver because forking this threaded process can deadlock
+        self._parse_pool = ProcessPoolExecutor(
+            max_workers=min(settings.max_concurrency, os.cpu_count() or 1),
+            mp_context=multiprocessing.get_context("forkserver")
+        )
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
         if self.client:
             await self.client.aclose()
+        if self._parse_pool:
+            # shutdown() joins the worker processes; don't block the loop on it
+            await asyncio.get_running_loop().run_in_executor(None, self._parse_pool.shutdown)
     
     async def init_database(self):
         """Initialize database schema (idempotent)"""
         async with self.engine.begin() as conn:
             # Create schema if not exists
-            await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {settings.schema_name}"))
+            await conn.execute(CreateSchema(settings.schema_name, if_not_exists=True))
             # Create tables only if they don't exist (idempotent)
             await conn.run_sync(Base.metadata.create_all)
+            # create_all never alters existing tables, so apply migrate.sql's upgrades here
+            await self._upgrade_schema(conn)
         logger.info("Database schema checked/initialized")
     
+    @staticmethod
+    async def _upgrade_schema(conn: AsyncConnection):
+        """Bring tables created by older versions up to the current models (mirrors migrate.sql)"""
+        documents = Document.__table__
+        # JSON arrays used to be stored as TEXT
+        data_type = await conn.scalar(
+            text(
+                "SELECT data_type FROM information_schema.columns "
+                "WHERE table_schema = :schema AND table_name = :table AND column_name = 'regulated_products'"
+            ),
+            {'schema': documents.schema, 'table': documents.name}
+        )
+        if data_type == 'text':
+            logger.info("Converting %s JSON array columns from TEXT to JSONB", documents.fullname)
+            for column in ('regulated_products', 'topics'):
+                await conn.execute(text(f"DROP INDEX IF EXISTS {documents.schema}.idx_documents_{column}"))
+            await conn.execute(text(
+                f"ALTER TABLE {documents.fullname} "
+                "ALTER COLUMN regulated_products TYPE JSONB USING NULLIF(regulated_products, '')::jsonb, "
+                "ALTER COLUMN topics TYPE JSONB USING NULLIF(topics, '')::jsonb"
+            ))
+            for column in ('regulated_products', 'topics'):
+                await conn.execute(text(
+                    f"CREATE INDEX idx_documents_{column} ON {documents.fullname} USING GIN ({column})"
+                ))
+        
+        attachments = DocumentAttachment.__table__
+        # Check the catalog first: ALTER TABLE takes an ACCESS EXCLUSIVE lock even when
+        # IF NOT EXISTS turns it into a no-op, and crawl runs this on every start
+        attachment_columns = set(await conn.scalars(
+            text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = :schema AND table_name = :table"
+            ),
+            {'schema': attachments.schema, 'table': attachments.name}
+        ))
+        if 'content_encoding' not in attachment_columns:
+            await conn.execute(text(
+                f"ALTER TABLE {attachments.fullname} ADD COLUMN content_encoding VARCHAR(20)"
+            ))
+        
+        # Shared PDF bytes: content_ref_id, its checksum lookup index and the delete hand-over
+        if 'content_ref_id' not in attachment_columns:
+            await conn.execute(text(
+                f"ALTER TABLE {attachments.fullname} ADD COLUMN content_ref_id UUID"
+            ))
+        if await conn.scalar(text(f"SELECT to_regclass('{attachments.schema}.idx_attachments_checksum')")) is None:
+            await conn.execute(text(
+                f"CREATE INDEX idx_attachments_checksum ON {attachments.fullname} (checksum)"
+            ))
+        delete_rule = await conn.scalar(text(
+            "SELECT confdeltype FROM pg_constraint "
+            f"WHERE conname = 'document_attachments_content_ref_id_fkey' AND conrelid = '{attachments.fullname}'::regclass"
+        ))
+        if delete_rule != 'n':
+            await conn.execute(text(
+                f"ALTER TABLE {attachments.fullname} DROP CONSTRAINT IF EXISTS document_attachments_content_ref_id_fkey"
+            ))
+            await conn.execute(text(
+                f"ALTER TABLE {attachments.fullname} ADD CONSTRAINT document_attachments_content_ref_id_fkey "
+                f"FOREIGN KEY (content_ref_id) REFERENCES {attachments.fullname}(id) ON DELETE SET NULL"
+            ))
+        if await conn.scalar(text(f"SELECT to_regprocedure('{attachments.schema}.hand_over_shared_pdf()')")) is None:
+            await conn.execute(text(_HAND_OVER_SHARED_PDF_SQL.read_text()))
+        has_trigger = await conn.scalar(text(
+            f"SELECT 1 FROM pg_trigger WHERE tgname = 'hand_over_shared_pdf' AND tgrelid = '{attachments.fullname}'::regclass"
+        ))
+        if not has_trigger:
+            await conn.execute(text(
+                f"CREATE TRIGGER hand_over_shared_pdf BEFORE DELETE ON {attachments.fullname} "
+                f"FOR EACH ROW EXECUTE FUNCTION {attachments.schema}.hand_over_shared_pdf()"
+            ))
+    
     async def crawl(self, test_limit: Optional[int] = None, resume_session_id: Optional[str] = None) -> str:
         """Main crawl method"""
         await self.init_database()
@@ -129,60 +500,58 @@ class FDACrawler:
         # Process documents
         await self._process_documents_with_metadata(documents_with_metadata, self.session_id)
         
-        # Mark session complete
+        # Mark session complete in one UPDATE; the per-document counters
+        # were already applied with each write batch
         async with self.async_session() as db_session:
-            session = await db_session.get(CrawlSession, self.session_id)
-            session.status = "completed"
-            session.completed_at = datetime.utcnow()
+            await db_session.execute(
+                update(CrawlSession)
+                .where(CrawlSession.id == self.session_id)
+                .values(status="completed", completed_at=datetime.utcnow())
+            )
             await db_session.commit()
         
         logger.info(f"Crawl completed. Session ID: {self.session_id}")
         return self.session_id
     
-    async def _get_documents_from_api(self) -> List[Dict[str, Any]]:
+    async def _get_documents_from_api(self) -> List[DocData]:
         """Get document data with metadata from FDA JSON API"""
         try:
-            response = await self.client.get("https://www.fda.gov/files/api/datatables/static/search-for-guidance.json")
+            response = await self.client.get(_LISTING_URL, headers=_LISTING_HEADERS)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             documents = []
             for item in data:
                 # Extract URL from title HTML
                 title_html = item.get('title', '')
-                soup = BeautifulSoup(title_html, 'html.parser')
-                link = soup.find('a')
-                if link:
-                    url_path = link.get('href', '')
-                    full_url = urljoin('https://www.fda.gov', url_path) if url_path else ''
-                    title_text = link.get_text(strip=True)
+                link = _first_link(title_html)
+                if link is None and title_html.strip():
+                    logger.warning("No link found in listing title %.100r", title_html)
+                if link is not None:
+                    url_path, title_text = link
+                    full_url = _absolute_url(url_path) if url_path else ''
                     
                     if full_url and title_text:
                         # Extract metadata from JSON
-                        doc_data = {
-                            'document_url': full_url,
-                            'title': title_text,
-                            'issue_date': item.get('field_issue_datetime', ''),
-                            'fda_organization': item.get('field_issuing_office_taxonomy', '') or item.get('field_center', ''),
-                            'topic': item.get('topics-product', '') or item.get('term_node_tid', ''),
-                            'guidance_status': item.get('field_final_guidance_1', ''),
-                            'open_for_comment': 'yes' in item.get('open-comment', '').lower(),
-                            'comment_closing_date': item.get('field_comment_close_date', ''),
-                            'guidance_type': item.get('field_communication_type', ''),
-                            'regulated_products': json.dumps([item.get('field_regulated_product_field', '')]) if item.get('field_regulated_product_field') else '',
-                            'topics': json.dumps([item.get('field_health_topics', '')]) if item.get('field_health_topics') else '',
-                            'content_current_date': '',
-                            'summary': '',  # Will be filled from HTML if available
-                            'pdf_url': ''   # Will be filled from HTML if available
-                        }
+                        # summary and pdf_url are filled from HTML if available
+                        doc_data = DocData(
+                            document_url=full_url,
+                            title=title_text,
+                            issue_date=item.get('field_issue_datetime', ''),
+                            fda_organization=item.get('field_issuing_office_taxonomy', '') or item.get('field_center', ''),
+                            topic=item.get('topics-product', '') or item.get('term_node_tid', ''),
+                            guidance_status=item.get('field_final_guidance_1', ''),
+                            open_for_comment='yes' in item.get('open-comment', '').lower(),
+                            comment_closing_date=item.get('field_comment_close_date', ''),
+                            guidance_type=item.get('field_communication_type', ''),
+                            regulated_products=[item['field_regulated_product_field']] if item.get('field_regulated_product_field') else None,
+                            topics=[item['field_health_topics']] if item.get('field_health_topics') else None,
+                        )
                         
                         # Extract docket number from HTML
-                        docket_html = item.get('field_docket_number', '')
-                        if docket_html:
-                            docket_soup = BeautifulSoup(docket_html, 'html.parser')
-                            docket_link = docket_soup.find('a')
-                            if docket_link:
-                                doc_data['docket_number'] = docket_link.get_text(strip=True)
+                        docket_link = _first_link(item.get('field_docket_number', ''))
+                        if docket_link is not None:
+                            doc_data.docket_number = docket_link[1]
                         
                         documents.append(doc_data)
             
@@ -194,84 +563,101 @@ class FDACrawler:
             # Convert fallback to same format
             fallback_docs = []
             for doc in self.FALLBACK_DOCUMENTS:
-                fallback_doc = {
-                    'document_url': doc['document_url'],
-                    'title': doc['title'],
-                    'issue_date': doc.get('issue_date', ''),
-                    'fda_organization': doc.get('fda_organization', ''),
-                    'topic': doc.get('topic', ''),
-                    'guidance_status': doc.get('guidance_status', ''),
-                    'open_for_comment': doc.get('open_for_comment', False),
-                    'comment_closing_date': '',
-                    'docket_number': '',
-                    'guidance_type': '',
-                    'regulated_products': '',
-                    'topics': '',
-                    'content_current_date': '',
-                    'summary': '',
-                    'pdf_url': doc.get('pdf_url', '')
-                }
+                fallback_doc = DocData(
+                    document_url=doc['document_url'],
+                    title=doc['title'],
+                    issue_date=doc.get('issue_date', ''),
+                    fda_organization=doc.get('fda_organization', ''),
+                    topic=doc.get('topic', ''),
+                    guidance_status=doc.get('guidance_status', ''),
+                    open_for_comment=doc.get('open_for_comment', False),
+                    pdf_url=doc.get('pdf_url', ''),
+                )
                 fallback_docs.append(fallback_doc)
             return fallback_docs
     
-    async def _process_documents_with_metadata(self, documents: List[Dict[str, Any]], session_id: str):
+    async def _process_documents_with_metadata(self, documents: List[DocData], session_id: str):
         """Process documents with metadata and concurrency control"""
-        semaphore = asyncio.Semaphore(settings.max_concurrency)
+        # One query for the whole listing instead of a SELECT per document
+        existing_urls = await self._get_existing_document_urls([doc.document_url for doc in documents])
+        if existing_urls:
+            logger.info(f"Skipping {len(existing_urls)} documents that already exist")
+            documents = [doc for doc in documents if doc.document_url not in existing_urls]
+        
+        # Total is what this session has saved so far plus what is about to be dispatched,
+        # so processed_documents / total_documents reads as progress, also on resume
+        async with self.async_session() as db_session:
+            await db_session.execute(
+                update(CrawlSession)
+                .where(CrawlSession.id == session_id)
+                .values(total_documents=CrawlSession.processed_documents + len(documents))
+            )
+            await db_session.commit()
         
-        async def process_single(doc_data: Dict[str, Any]):
-            async with semaphore:
-                await self._process_document_with_metadata(doc_data, session_id)
-                await asyncio.sleep(1.0 / settings.rate_limit)  # Rate limiting
+        # A fixed pool of workers pulls from one shared iterator, so only
+        # MAX_CONCURRENCY tasks exist no matter how long the listing is
+        pending_docs = iter(documents)
         
-        tasks = [process_single(doc) for doc in documents]
-        await asyncio.gather(*tasks, return_exceptions=True)
+        async def worker():
+            for doc_data in pending_docs:
+                async with self._rate_limiter:
+                    await self._process_document_with_metadata(doc_data, session_id)
+        
+        workers = [worker() for _ in range(min(settings.max_concurrency, len(documents)))]
+        await asyncio.gather(*workers, return_exceptions=True)
+        
+        # Write whatever is left in the last partial batch
+        await self._flush_documents(session_id)
     
-    async def _process_document_with_metadata(self, doc_data: Dict[str, Any], session_id: str):
+    async def _get_existing_document_urls(self, document_urls: List[str]) -> Set[str]:
+        """Return the subset of document URLs already stored in the database"""
+        if not document_urls:
+            return set()
+        async with self.async_session() as db_session:
+            result = await db_session.execute(
+                select(Document.document_url).where(Document.document_url.in_(document_urls))
+            )
+            return set(result.scalars().all())
+    
+    async def _process_document_with_metadata(self, doc_data: DocData, session_id: str):
         """Process a single document with pre-extracted metadata from JSON API"""
-        document_url = doc_data['document_url']
+        document_url = doc_data.document_url
         try:
-            # Check if document already exists
-            async with self.async_session() as db_session:
-                result = await db_session.execute(
-                    select(Document).where(Document.document_url == document_url)
-                )
-                existing_doc = result.scalar_one_or_none()
-                if existing_doc:
-                    logger.info(f"Document already exists: {document_url}")
-                    return
-            
             # Fetch document page only for PDF links and additional content
             try:
                 response = await self.client.get(document_url)
                 response.raise_for_status()
                 
                 # Parse HTML for PDF links and summary (but keep JSON metadata)
-                html_data = self._parse_document_page(response.text, document_url)
+                html_data = await self._parse_document_page(response.text, document_url)
                 
                 # Merge: Use JSON metadata as primary, HTML as supplement
-                final_doc_data = doc_data.copy()  # Start with rich JSON metadata
-                if html_data.get('pdf_url'):
-                    final_doc_data['pdf_url'] = html_data['pdf_url']
-                if html_data.get('summary'):
-                    final_doc_data['summary'] = html_data['summary']
+                final_doc_data = replace(
+                    doc_data,
+                    pdf_url=html_data.pdf_url or doc_data.pdf_url,
+                    summary=html_data.summary or doc_data.summary
+                )
                 
             except Exception as e:
-                logger.warning(f"Could not fetch HTML for {document_url}: {e}")
+                if _is_throttled(e) or _is_pool_failure(e):
+                    # Saving without the page would hide it from later crawls; fail it instead
+                    raise
+                logger.warning("Could not fetch HTML for %s: %s", document_url, e)
                 final_doc_data = doc_data  # Use JSON metadata only
             
             # Download PDF if available
             pdf_data = None
-            if final_doc_data.get('pdf_url'):
-                pdf_data = await self._download_pdf(final_doc_data['pdf_url'])
+            if final_doc_data.pdf_url:
+                pdf_data = await self._download_pdf(final_doc_data.pdf_url)
             
             # Save to database with rich metadata
             await self._save_document(final_doc_data, pdf_data, session_id)
             
-            logger.info(f"Processed with metadata: {final_doc_data.get('title', 'Unknown')[:50]}...")
+            logger.info("Processed with metadata: %.50s...", final_doc_data.title or 'Unknown')
             
         except Exception as e:
-            logger.error(f"Error processing {document_url}: {e}")
-            await self._update_session_error_count(session_id)
+            logger.error("Error processing %s: %s", document_url, e)
+            self._pending_failures += 1
     
     async def _process_document(self, document_url: str, session_id: str):
         """Process a single document: fetch, parse, download PDF, save to DB"""
@@ -283,7 +669,7 @@ class FDACrawler:
                 )
                 existing_doc = result.scalar_one_or_none()
                 if existing_doc:
-                    logger.info(f"Document already exists: {document_url}")
+                    logger.debug("Document already exists: %s", document_url)
                     return
             
             # Fetch document page
@@ -291,192 +677,320 @@ class FDACrawler:
             response.raise_for_status()
             
             # Parse document metadata
-            doc_data = self._parse_document_page(response.text, document_url)
+            doc_data = await self._parse_document_page(response.text, document_url)
             
             # Download PDF if available
             pdf_data = None
-            if doc_data.get('pdf_url'):
-                pdf_data = await self._download_pdf(doc_data['pdf_url'])
+            if doc_data.pdf_url:
+                pdf_data = await self._download_pdf(doc_data.pdf_url)
             
             # Save to database
             await self._save_document(doc_data, pdf_data, session_id)
             
-            logger.info(f"Processed: {doc_data.get('title', 'Unknown')[:50]}...")
+            logger.info("Processed: %.50s...", doc_data.title or 'Unknown')
             
         except Exception as e:
-            logger.error(f"Error processing {document_url}: {e}")
-            await self._update_session_error_count(session_id)
+            logger.error("Error processing %s: %s", document_url, e)
+            self._pending_failures += 1
     
-    def _parse_document_page(self, html: str, document_url: str) -> Dict[str, Any]:
-        """Parse FDA document page to extract metadata"""
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Basic document data
-        doc_data = {
-            'document_url': document_url,
-            'title': '',
-            'summary': '',
-            'issue_date': '',
-            'fda_organization': '',
-            'topic': '',
-            'guidance_status': '',
-            'open_for_comment': False,
-            'comment_closing_date': '',
-            'docket_number': '',
-            'guidance_type': '',
-            'regulated_products': '',
-            'topics': '',
-            'content_current_date': '',
-            'pdf_url': ''
-        }
-        
-        # Extract title
-        title_elem = soup.find('h1')
-        if title_elem:
-            doc_data['title'] = title_elem.get_text(strip=True)
-        
-        # Extract PDF link
-        pdf_link = soup.find('a', href=re.compile(r'/media/\d+/download'))
-        if pdf_link:
-            pdf_url = pdf_link.get('href')
-            if pdf_url.startswith('/'):
-                pdf_url = f"https://www.fda.gov{pdf_url}"
-            doc_data['pdf_url'] = pdf_url
-        
-        # Extract sidebar metadata
-        sidebar = soup.find('div', class_='region-sidebar-second') or soup.find('aside')
-        if sidebar:
-            # Look for structured data in sidebar
-            for dt_dd_pair in sidebar.find_all(['dt', 'dd']):
-                if dt_dd_pair.name == 'dt':
-                    label = dt_dd_pair.get_text(strip=True).lower()
-                    dd = dt_dd_pair.find_next_sibling('dd')
-                    if dd:
-                        value = dd.get_text(strip=True)
-                        
-                        if 'issue date' in label or 'issued' in label:
-                            doc_data['issue_date'] = value
-                        elif 'organization' in label or 'center' in label:
-                            doc_data['fda_organization'] = value
-                        elif 'topic' in label:
-                            doc_data['topic'] = value
-                        elif 'status' in label or 'guidance status' in label:
-                            doc_data['guidance_status'] = value
-                        elif 'docket' in label:
-                            doc_data['docket_number'] = value
-                        elif 'type' in label:
-                            doc_data['guidance_type'] = value
-                        elif 'regulated product' in label:
-                            # Convert to JSON array
-                            products = [p.strip() for p in value.split(',') if p.strip()]
-                            doc_data['regulated_products'] = json.dumps(products)
-                        elif 'current as of' in label:
-                            doc_data['content_current_date'] = value
-        
-        # Extract summary from main content
-        main_content = soup.find('div', class_='field-type-text-with-summary') or soup.find('div', class_='field-item')
-        if main_content:
-            paragraphs = main_content.find_all('p')
-            if paragraphs:
-                doc_data['summary'] = paragraphs[0].get_text(strip=True)[:1000]  # Limit length
-        
-        return doc_data
+    async def _parse_document_page(self, html: str, document_url: str) -> DocData:
+        """Parse a document page in the worker pool, off the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._parse_pool, _parse_document_page, html, document_url)
     
     async def _download_pdf(self, pdf_url: str) -> Optional[Dict[str, Any]]:
-        """Download PDF file and return binary data with metadata"""
+        """Download PDF, sharing the result with documents that link the same file"""
+        download = self._pdf_cache.get(pdf_url)
+        if download is None:
+            download = asyncio.ensure_future(self._fetch_pdf(pdf_url))
+            self._pdf_cache[pdf_url] = download
+            if len(self._pdf_cache) > _PDF_CACHE_SIZE:
+                self._pdf_cache.popitem(last=False)
+        else:
+            self._pdf_cache.move_to_end(pdf_url)
+            logger.debug("Reusing download for %s", pdf_url)
+        
+        pdf_data = None
         try:
-            response = await self.client.get(pdf_url)
-            response.raise_for_status()
-            
-            pdf_content = response.content
-            checksum = hashlib.sha256(pdf_content).hexdigest()
+            pdf_data = await asyncio.shield(download)
+        finally:
+            if pdf_data is None and self._pdf_cache.get(pdf_url) is download:
+                # Let a later document retry a failed download
+                del self._pdf_cache[pdf_url]
+        return pdf_data
+    
+    async def _fetch_pdf(self, pdf_url: str) -> Optional[Dict[str, Any]]:
+        """Stream PDF download, hashing chunks as they arrive"""
+        try:
+            async with self.client.stream('GET', pdf_url) as response:
+                response.raise_for_status()
+                
+                if settings.pdf_storage == 'filesystem':
+                    return await self._stream_pdf_to_file(response)
+                
+                digest = hashlib.sha256()
+                chunks = []
+                async for chunk in response.aiter_bytes(_DOWNLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
+                    chunks.append(chunk)
+                pdf_content = b''.join(chunks)
             
+            # zstandard releases the GIL, so compress off the event loop
+            compressed = await asyncio.get_running_loop().run_in_executor(
+                None, zstandard.compress, pdf_content, _PDF_ZSTD_LEVEL
+            )
             return {
-                'pdf_content': pdf_content,
-                'checksum': checksum,
+                'pdf_content': compressed,
+                'content_encoding': 'zstd',
+                'checksum': digest.hexdigest(),
                 'size_bytes': len(pdf_content)
             }
             
         except Exception as e:
-            logger.error(f"Error downloading PDF {pdf_url}: {e}")
+            if _is_throttled(e):
+                # Fail the document rather than save it without its PDF
+                raise
+            logger.error("Error downloading PDF %s: %s", pdf_url, e)
             return None
     
-    async def _save_document(self, doc_data: Dict[str, Any], pdf_data: Optional[Dict[str, Any]], session_id: str):
-        """Save document and PDF to database"""
-        async with self.async_session() as db_session:
+    async def _stream_pdf_to_file(self, response: httpx.Response) -> Dict[str, Any]:
+        """Write a streamed PDF under PDF_ROOT keyed by checksum, never holding it in memory"""
+        # All filesystem calls go to the default thread pool so disk I/O never stalls other requests
+        loop = asyncio.get_running_loop()
+        tmp_path = settings.pdf_root / f"{uuid.uuid4().hex}.tmp"
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            f = await loop.run_in_executor(None, _open_for_write, tmp_path)
             try:
-                # Create document record
-                document = Document(
-                    crawl_session_id=session_id,
-                    document_url=doc_data['document_url'],
-                    title=doc_data['title'],
-                    summary=doc_data['summary'],
-                    issue_date=doc_data['issue_date'],
-                    fda_organization=doc_data['fda_organization'],
-                    topic=doc_data['topic'],
-                    guidance_status=doc_data['guidance_status'],
-                    open_for_comment=doc_data['open_for_comment'],
-                    comment_closing_date=doc_data['comment_closing_date'],
-                    docket_number=doc_data['docket_number'],
-                    guidance_type=doc_data['guidance_type'],
-                    regulated_products=doc_data['regulated_products'],
-                    topics=doc_data['topics'],
-                    content_current_date=doc_data['content_current_date'],
-                    processing_status='completed',
-                    processed_at=datetime.utcnow()
-                )
-                
-                if pdf_data:
-                    document.pdf_checksum = pdf_data['checksum']
-                    document.pdf_size_bytes = pdf_data['size_bytes']
-                
-                db_session.add(document)
-                await db_session.flush()  # Get document ID
-                
-                # Create attachment record if PDF was downloaded
-                if pdf_data and doc_data.get('pdf_url'):
-                    attachment = DocumentAttachment(
-                        document_id=document.id,
-                        filename=f"{document.id}.pdf",
-                        source_url=doc_data['pdf_url'],
-                        file_type='pdf',
-                        pdf_content=pdf_data['pdf_content'],
-                        checksum=pdf_data['checksum'],
-                        size_bytes=pdf_data['size_bytes'],
-                        download_status='completed',
-                        downloaded_at=datetime.utcnow()
+                async for chunk in response.aiter_bytes(_DOWNLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    await loop.run_in_executor(None, f.write, chunk)
+            finally:
+                await loop.run_in_executor(None, f.close)
+            
+            checksum = digest.hexdigest()
+            path = await loop.run_in_executor(None, _move_into_place, tmp_path, checksum)
+        finally:
+            await loop.run_in_executor(None, lambda: tmp_path.unlink(missing_ok=True))
+        
+        return {
+            'pdf_content': None,
+            'local_path': str(path),
+            'checksum': checksum,
+            'size_bytes': size
+        }
+    
+    async def _save_document(self, doc_data: DocData, pdf_data: Optional[Dict[str, Any]], session_id: str):
+        """Queue document and PDF for the next batched database write"""
+        document_id = uuid.uuid4()
+        document_row = {
+            'id': document_id,
+            'crawl_session_id': session_id,
+            'document_url': doc_data.document_url,
+            'title': doc_data.title,
+            'summary': doc_data.summary,
+            'issue_date': doc_data.issue_date,
+            'fda_organization': doc_data.fda_organization,
+            'topic': doc_data.topic,
+            'guidance_status': doc_data.guidance_status,
+            'open_for_comment': doc_data.open_for_comment,
+            'comment_closing_date': doc_data.comment_closing_date,
+            'docket_number': doc_data.docket_number,
+            'guidance_type': doc_data.guidance_type,
+            'regulated_products': doc_data.regulated_products,
+            'topics': doc_data.topics,
+            'content_current_date': doc_data.content_current_date,
+            'processing_status': 'completed',
+            'processed_at': datetime.utcnow(),
+            'pdf_checksum': pdf_data['checksum'] if pdf_data else None,
+            'pdf_size_bytes': pdf_data['size_bytes'] if pdf_data else None,
+            'pdf_path': None,
+        }
+        
+        # Create attachment record if PDF was downloaded
+        attachment_row = None
+        if pdf_data and doc_data.pdf_url:
+            # With PDF_STORAGE=filesystem only the pointer goes to the DB
+            local_path = pdf_data.get('local_path')
+            document_row['pdf_path'] = local_path
+            
+            attachment_row = {
+                'id': uuid.uuid4(),
+                'document_id': document_id,
+                'filename': f"{document_id}.pdf",
+                'source_url': doc_data.pdf_url,
+                'file_type': 'pdf',
+                'local_path': local_path,
+                'pdf_content': pdf_data['pdf_content'],
+                'content_encoding': pdf_data.get('content_encoding'),
+                'content_ref_id': None,
+                'checksum': pdf_data['checksum'],
+                'size_bytes': pdf_data['size_bytes'],
+                'download_status': 'completed',
+                'downloaded_at': datetime.utcnow(),
+            }
+        
+        self._pending_writes.append((document_row, attachment_row))
+        if len(self._pending_writes) >= settings.write_batch_size:
+            await self._flush_documents(session_id)
+    
+    async def _flush_documents(self, session_id: str):
+        """Write queued documents, attachments and session counters in a single transaction"""
+        async with self._flush_lock:
+            batch, self._pending_writes = self._pending_writes, []
+            failed, self._pending_failures = self._pending_failures, 0
+            if not batch and not failed:
+                return
+            
+            inserted_ids = set()
+            row_failures = 0
+            async with self.async_session() as db_session:
+                try:
+                    if batch:
+                        document_rows = [document_row for document_row, _ in batch]
+                        # Full batches go through COPY; only the last partial batch of a crawl uses INSERT
+                        use_copy = len(batch) >= settings.write_batch_size
+                        
+                        # Skip documents another worker or crawl already saved
+                        if use_copy:
+                            inserted_ids = await self._bulk_copy(
+                                db_session, Document.__table__, document_rows,
+                                "ON CONFLICT (document_url) DO NOTHING"
+                            )
+                        else:
+                            result = await db_session.execute(
+                                pg_insert(Document)
+                                .on_conflict_do_nothing(index_elements=['document_url'])
+                                .returning(Document.id),
+                                document_rows
+                            )
+                            inserted_ids = set(result.scalars().all())
+                        
+                        attachment_rows = [
+                            attachment_row for document_row, attachment_row in batch
+                            if attachment_row and document_row['id'] in inserted_ids
+                        ]
+                        attachment_rows = await self._share_pdf_content(db_session, attachment_rows)
+                        if attachment_rows and use_copy:
+                            await self._bulk_copy(db_session, DocumentAttachment.__table__, attachment_rows)
+                        elif attachment_rows:
+                            await db_session.execute(insert(DocumentAttachment), attachment_rows)
+                    
+                    await db_session.execute(
+                        self._session_counters_update(session_id, len(inserted_ids), failed)
                     )
-                    db_session.add(attachment)
-                
-                await db_session.commit()
-                
-                # Update session progress
-                await self._update_session_progress(session_id)
-                
-            except IntegrityError:
-                # Document already exists
-                await db_session.rollback()
-                logger.info(f"Document already exists (integrity constraint): {doc_data['document_url']}")
+                    await db_session.commit()
+                    
+                except Exception as e:
+                    await db_session.rollback()
+                    logger.error(f"Error saving batch of {len(batch)} documents, retrying one by one: {e}")
+                    inserted_ids, row_failures = await self._save_rows_individually(db_session, batch)
+                    failed += row_failures
+                    await db_session.execute(
+                        self._session_counters_update(session_id, len(inserted_ids), failed)
+                    )
+                    await db_session.commit()
+            
+            skipped = len(batch) - len(inserted_ids) - row_failures
+            if skipped:
+                logger.info(f"{skipped} documents already existed (integrity constraint)")
+    
+    @staticmethod
+    async def _share_pdf_content(db_session: AsyncSession, attachment_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the rows with duplicate PDFs pointed at an already stored copy instead of carrying the bytes"""
+        rows = [row for row in attachment_rows if row['pdf_content'] is not None]
+        if not rows:
+            return attachment_rows
+        result = await db_session.execute(
+            select(DocumentAttachment.checksum, DocumentAttachment.id)
+            .where(DocumentAttachment.checksum.in_({row['checksum'] for row in rows}))
+            .where(DocumentAttachment.pdf_content.is_not(None))
+        )
+        owners = dict(result.all())
+        # The first row with a new checksum keeps its bytes; later ones in the batch refer to it.
+        # Queued rows are copied, not changed, so a row-by-row retry still has every PDF
+        shared_rows = []
+        for row in attachment_rows:
+            owner_id = owners.setdefault(row['checksum'], row['id']) if row['pdf_content'] is not None else row['id']
+            if owner_id != row['id']:
+                row = {**row, 'pdf_content': None, 'content_encoding': None, 'content_ref_id': owner_id}
+            shared_rows.append(row)
+        return shared_rows
+    
+    @staticmethod
+    async def _save_rows_individually(db_session: AsyncSession, batch: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]) -> Tuple[Set[uuid.UUID], int]:
+        """Insert each queued document under its own SAVEPOINT; returns the inserted ids and failure count"""
+        # One bad row only loses that document instead of the whole batch
+        inserted_ids = set()
+        failures = 0
+        for document_row, attachment_row in batch:
+            try:
+                async with db_session.begin_nested():
+                    document_id = await db_session.scalar(
+                        pg_insert(Document)
+                        .values(document_row)
+                        .on_conflict_do_nothing(index_elements=['document_url'])
+                        .returning(Document.id)
+                    )
+                    if document_id is not None and attachment_row:
+                        await db_session.execute(insert(DocumentAttachment).values(attachment_row))
             except Exception as e:
-                await db_session.rollback()
-                logger.error(f"Error saving document {doc_data['document_url']}: {e}")
-                raise
+                logger.error("Error saving %s: %s", document_row['document_url'], e)
+                failures += 1
+                continue
+            if document_id is not None:
+                inserted_ids.add(document_id)
+        return inserted_ids, failures
     
-    async def _update_session_progress(self, session_id: str):
-        """Update session progress counters"""
-        async with self.async_session() as db_session:
-            session = await db_session.get(CrawlSession, session_id)
-            session.processed_documents += 1
-            session.successful_downloads += 1
-            await db_session.commit()
+    @staticmethod
+    async def _bulk_copy(db_session: AsyncSession, table: Table, rows: List[Dict[str, Any]], on_conflict: Optional[str] = None) -> Set[uuid.UUID]:
+        """COPY rows into `table` over the session's asyncpg connection; returns the inserted ids"""
+        # created_at/updated_at only have client-side defaults, so fill them in here
+        now = await db_session.scalar(text("SELECT LOCALTIMESTAMP"))
+        defaults = {name: now for name in ('created_at', 'updated_at') if name in table.c}
+        columns = list({**defaults, **rows[0]})
+        records = [
+            tuple(
+                orjson.dumps(value).decode() if isinstance(value, (list, dict)) else value
+                for value in {**defaults, **row}.values()
+            )
+            for row in rows
+        ]
+        
+        connection = await db_session.connection()
+        raw_connection = (await connection.get_raw_connection()).driver_connection
+        if on_conflict is None:
+            await raw_connection.copy_records_to_table(
+                table.name, records=records, columns=columns, schema_name=table.schema
+            )
+            return {row['id'] for row in rows}
+        
+        # COPY cannot skip conflicting rows, so load a temp table and INSERT ... SELECT from it
+        stage = f"{table.name}_stage"
+        await db_session.execute(text(f"CREATE TEMP TABLE {stage} (LIKE {table.fullname}) ON COMMIT DROP"))
+        await raw_connection.copy_records_to_table(stage, records=records, columns=columns)
+        column_list = ", ".join(columns)
+        result = await db_session.execute(text(
+            f"INSERT INTO {table.fullname} ({column_list}) "
+            f"SELECT {column_list} FROM {stage} {on_conflict} RETURNING id"
+        ))
+        return set(result.scalars().all())
     
-    async def _update_session_error_count(self, session_id: str):
-        """Update session error count"""
-        async with self.async_session() as db_session:
-            session = await db_session.get(CrawlSession, session_id)
-            session.error_count += 1
-            session.failed_documents += 1
-            await db_session.commit()
+    @staticmethod
+    def _session_counters_update(session_id: str, succeeded: int, failed: int):
+        """Build an in-place UPDATE of the session progress counters"""
+        return (
+            update(CrawlSession)
+            .where(CrawlSession.id == session_id)
+            .values(
+                processed_documents=CrawlSession.processed_documents + succeeded,
+                successful_downloads=CrawlSession.successful_downloads + succeeded,
+                failed_documents=CrawlSession.failed_documents + failed,
+                error_count=CrawlSession.error_count + failed,
+            )
+        )
     
     async def get_session_status(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get crawl session status"""
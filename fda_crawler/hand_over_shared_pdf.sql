@@ -0,0 +1,20 @@
+-- Before an attachment holding shared PDF bytes is deleted, move the bytes to
+-- one of the attachments referring to it and repoint the rest there.
+-- Used by migrate.sql and by FDACrawler.init_database.
+CREATE OR REPLACE FUNCTION source.hand_over_shared_pdf()
+RETURNS TRIGGER AS $$
+DECLARE
+    heir UUID;
+BEGIN
+    IF OLD.pdf_content IS NOT NULL THEN
+        SELECT id INTO heir FROM source.document_attachments WHERE content_ref_id = OLD.id LIMIT 1;
+        IF heir IS NOT NULL THEN
+            UPDATE source.document_attachments
+            SET pdf_content = OLD.pdf_content, content_encoding = OLD.content_encoding, content_ref_id = NULL
+            WHERE id = heir;
+            UPDATE source.document_attachments SET content_ref_id = heir WHERE content_ref_id = OLD.id;
+        END IF;
+    END IF;
+    RETURN OLD;
+END;
+$$ language 'plpgsql';
@@ -52,8 +52,8 @@ CREATE TABLE IF NOT EXISTS documents (
     guidance_type VARCHAR(100),
     
     -- Enhanced metadata from sidebar
-    regulated_products TEXT,            -- JSON array: ["Biologics", "Medical Devices"]
-    topics TEXT,                        -- JSON array: ["User Fees", "Administrative / Procedural"] 
+    regulated_products JSONB,           -- JSON array: ["Biologics", "Medical Devices"]
+    topics JSONB,                       -- JSON array: ["User Fees", "Administrative / Procedural"] 
     content_current_date VARCHAR(50),   -- Content current as of date
     
     -- Processing status
@@ -84,6 +84,8 @@ CREATE TABLE IF NOT EXISTS document_attachments (
     -- Download info
     local_path VARCHAR(500),  -- Keep for backward compatibility, can be null
     pdf_content BYTEA,        -- Store PDF binary data directly in PostgreSQL
+    content_encoding VARCHAR(20),  -- 'zstd' when pdf_content is compressed, NULL for raw bytes
+    content_ref_id UUID REFERENCES document_attachments(id) ON DELETE SET NULL,  -- Attachment holding identical pdf_content
     checksum VARCHAR(64),
     size_bytes INTEGER,
     
@@ -99,17 +101,39 @@ CREATE TABLE IF NOT EXISTS document_attachments (
     UNIQUE(document_id, source_url)
 );
 
+-- Convert JSON arrays stored as TEXT by older versions to JSONB
+DO $$
+BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_schema = 'source' AND table_name = 'documents'
+          AND column_name = 'regulated_products') = 'text' THEN
+        DROP INDEX IF EXISTS idx_documents_regulated_products;
+        DROP INDEX IF EXISTS idx_documents_topics;
+        ALTER TABLE documents
+            ALTER COLUMN regulated_products TYPE JSONB USING NULLIF(regulated_products, '')::jsonb,
+            ALTER COLUMN topics TYPE JSONB USING NULLIF(topics, '')::jsonb;
+    END IF;
+END $$;
+
+-- Added after the first release; older tables hold only raw PDF bytes
+ALTER TABLE document_attachments ADD COLUMN IF NOT EXISTS content_encoding VARCHAR(20);
+ALTER TABLE document_attachments ADD COLUMN IF NOT EXISTS content_ref_id UUID;
+ALTER TABLE document_attachments DROP CONSTRAINT IF EXISTS document_attachments_content_ref_id_fkey;
+ALTER TABLE document_attachments ADD CONSTRAINT document_attachments_content_ref_id_fkey
+    FOREIGN KEY (content_ref_id) REFERENCES document_attachments(id) ON DELETE SET NULL;
+
 -- Create indexes for better query performance
 CREATE INDEX IF NOT EXISTS idx_documents_session_id ON documents(crawl_session_id);
 CREATE INDEX IF NOT EXISTS idx_documents_url ON documents(document_url);
 CREATE INDEX IF NOT EXISTS idx_documents_status ON documents(processing_status);
 CREATE INDEX IF NOT EXISTS idx_attachments_document_id ON document_attachments(document_id);
 CREATE INDEX IF NOT EXISTS idx_attachments_status ON document_attachments(download_status);
+CREATE INDEX IF NOT EXISTS idx_attachments_checksum ON document_attachments(checksum);
 CREATE INDEX IF NOT EXISTS idx_sessions_status ON crawl_sessions(status);
 
 -- Indexes for new sidebar metadata columns
-CREATE INDEX IF NOT EXISTS idx_documents_regulated_products ON documents USING GIN ((regulated_products::jsonb));
-CREATE INDEX IF NOT EXISTS idx_documents_topics ON documents USING GIN ((topics::jsonb));
+CREATE INDEX IF NOT EXISTS idx_documents_regulated_products ON documents USING GIN (regulated_products);
+CREATE INDEX IF NOT EXISTS idx_documents_topics ON documents USING GIN (topics);
 CREATE INDEX IF NOT EXISTS idx_documents_content_date ON documents(content_current_date);
 
 -- Create function to update updated_at timestamp
@@ -121,6 +145,16 @@ BEGIN
 END;
 $$ language 'plpgsql';
 
+-- Hand shared PDF bytes over before their attachment is deleted (kept in its own
+-- file so init_database can install the same function)
+\ir hand_over_shared_pdf.sql
+
+DROP TRIGGER IF EXISTS hand_over_shared_pdf ON document_attachments;
+CREATE TRIGGER hand_over_shared_pdf
+    BEFORE DELETE ON document_attachments
+    FOR EACH ROW
+    EXECUTE FUNCTION hand_over_shared_pdf();
+
 -- Create trigger for documents table
 DROP TRIGGER IF EXISTS update_documents_updated_at ON documents;
 CREATE TRIGGER update_documents_updated_at 
@@ -2,8 +2,8 @@
 import uuid
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import Column, String, DateTime, Integer, Text, Boolean, ForeignKey, Float, LargeBinary
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Integer, Text, Boolean, ForeignKey, Float, LargeBinary, Index
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -65,8 +65,8 @@ class Document(Base):
     guidance_type = Column(String(100), nullable=True)
     
     # Enhanced metadata from sidebar
-    regulated_products = Column(Text, nullable=True)      # JSON array as text
-    topics = Column(Text, nullable=True)                  # JSON array as text
+    regulated_products = Column(JSONB, nullable=True)     # JSON array
+    topics = Column(JSONB, nullable=True)                 # JSON array
     content_current_date = Column(String(50), nullable=True)
     
     # Processing status
@@ -89,23 +89,11 @@ class Document(Base):
     
     def get_regulated_products_list(self) -> List[str]:
         """Get regulated products as a list"""
-        if self.regulated_products:
-            try:
-                import json
-                return json.loads(self.regulated_products)
-            except (json.JSONDecodeError, TypeError):
-                return []
-        return []
+        return list(self.regulated_products or [])
     
     def get_topics_list(self) -> List[str]:
         """Get topics as a list"""
-        if self.topics:
-            try:
-                import json
-                return json.loads(self.topics)
-            except (json.JSONDecodeError, TypeError):
-                return []
-        return []
+        return list(self.topics or [])
     
     def __repr__(self):
         return f"<Document {self.title[:50] if self.title else 'Unknown'}... ({self.processing_status})>"
@@ -114,7 +102,11 @@ class Document(Base):
 class DocumentAttachment(Base):
     """Document attachments (PDFs and other files)"""
     __tablename__ = "document_attachments"
-    __table_args__ = {"schema": "source"}
+    __table_args__ = (
+        # Looked up by every write batch to share identical PDFs
+        Index("idx_attachments_checksum", "checksum"),
+        {"schema": "source"},
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     document_id = Column(UUID(as_uuid=True), ForeignKey("source.documents.id"), nullable=False)
@@ -127,6 +119,9 @@ class DocumentAttachment(Base):
     # Download info
     local_path = Column(String(500), nullable=True)
     pdf_content = Column(LargeBinary, nullable=True)  # Store PDF binary data directly
+    content_encoding = Column(String(20), nullable=True)  # "zstd" when pdf_content is compressed
+    # Attachment holding identical pdf_content; deleting it hands the bytes to a referrer first
+    content_ref_id = Column(UUID(as_uuid=True), ForeignKey("source.document_attachments.id", ondelete="SET NULL"), nullable=True)
     checksum = Column(String(64), nullable=True)  # SHA256
     size_bytes = Column(Integer, nullable=True)
     
@@ -6,11 +6,13 @@ setup(
     version="1.0.0",
     description="FDA Regulatory Guidelines Workflow: Crawling and Data Processing",
     packages=find_packages(),
+    package_data={"fda_crawler": ["*.sql"]},
     install_requires=[
         # Core crawler dependencies
-        "httpx>=0.25.0",
-        "beautifulsoup4>=4.12.0", 
+        "httpx[http2,brotli]>=0.25.0",
         "lxml>=4.9.0",
+        "orjson>=3.9.0",
+        "zstandard>=0.21.0",
         "sqlalchemy>=2.0.0",
         "asyncpg>=0.29.0",
         "typer>=0.9.0",